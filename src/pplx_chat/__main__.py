@@ -1,10 +1,20 @@
-import argparse
 import sys
+from types import SimpleNamespace
 
 from . import __version__
 
+# Value-taking flags and the attribute each one sets
+_VALUE_FLAGS = {
+    "-q": "question",
+    "--question": "question",
+    "-m": "model",
+    "--model": "model",
+}
+
+
+def _build_parser():
+    import argparse
 
-def main():
     parser = argparse.ArgumentParser(
         prog="pplx",
         description="Professional Perplexity AI terminal client",
@@ -18,8 +28,39 @@ def main():
     parser.add_argument(
         "-m", "--model", type=str, help="Model to use"
     )
+    return parser
+
 
-    args = parser.parse_args()
+def _parse_args(argv: list[str]) -> SimpleNamespace:
+    """
+    Scan argv for the handful of flags pplx accepts without importing argparse.
+    Anything else (--help, unknown or malformed flags) is handed to argparse,
+    which prints the usual help or error message.
+    """
+    args = SimpleNamespace(question=None, model=None)
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if arg in ("-v", "--version"):
+            print(f"pplx-chat {__version__}")
+            sys.exit(0)
+
+        flag, eq, value = arg.partition("=")
+        dest = _VALUE_FLAGS.get(flag)
+        if dest is None or (eq and not flag.startswith("--")):
+            return _build_parser().parse_args(argv)
+        if not eq:
+            i += 1
+            if i >= len(argv) or argv[i].startswith("-"):
+                return _build_parser().parse_args(argv)
+            value = argv[i]
+        setattr(args, dest, value)
+        i += 1
+    return args
+
+
+def main():
+    args = _parse_args(sys.argv[1:])
 
     try:
         from .app import ChatApp
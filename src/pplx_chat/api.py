@@ -1,15 +1,94 @@
-import json
 import logging
-from typing import Generator
+import re
+from typing import Generator, Iterable, Iterator
 
 import httpx
-from httpx_sse import connect_sse
 
 from .config import AppConfig
+from .jsonutil import json_dumps, json_loads
 from .models import APIResponse, UsageInfo, CostInfo, SearchResult
 
 logger = logging.getLogger(__name__)
 
+# Shared all-zero metadata for responses that carry no usage/cost block.
+# Responses are only read after streaming, never modified.
+_EMPTY_USAGE = UsageInfo()
+_EMPTY_COST = CostInfo()
+
+# choices[0].delta.content as a raw JSON string literal (escapes left intact)
+_DELTA_CONTENT_RE = re.compile(rb'"delta"\s*:\s*\{[^{}]*?"content"\s*:\s*"((?:[^"\\]|\\.)*)"')
+
+
+def _iter_sse_data(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Yield the data field of each server-sent event in a raw byte stream.
+
+    Only the parts of the SSE format the API uses are handled: ``data:`` lines
+    (multi-line data joined with newlines), comments and other fields are
+    skipped, and events end at a blank line. Lines may end in LF or CRLF.
+    """
+    buf = bytearray()
+    data_lines: list[bytes] = []
+    for chunk in chunks:
+        buf += chunk
+        start = 0
+        while True:
+            end = buf.find(b"\n", start)
+            if end == -1:
+                break
+            # Work on offsets into buf so a data line is copied out exactly once
+            line_end = end - 1 if end > start and buf[end - 1] == 0x0D else end  # CR
+            if line_end == start:
+                if data_lines:
+                    yield b"\n".join(data_lines)
+                    data_lines = []
+            elif buf.startswith(b"data:", start, line_end):
+                value_start = start + 5
+                if value_start < line_end and buf[value_start] == 0x20:  # space
+                    value_start += 1
+                data_lines.append(bytes(buf[value_start:line_end]))
+            start = end + 1
+        del buf[:start]
+
+    # Stream closed without a trailing blank line
+    if data_lines:
+        yield b"\n".join(data_lines)
+
+
+def _fast_delta(data: bytes) -> str | None:
+    """Pluck the delta content out of a raw SSE chunk without parsing all of it.
+
+    Returns None when the content is missing or empty, so the caller can fall
+    back to a full parse (e.g. for message-only chunks).
+    """
+    match = _DELTA_CONTENT_RE.search(data)
+    if not match:
+        return None
+    content = match.group(1)
+    if not content:
+        return None
+    if b"\\" in content:
+        try:
+            return json_loads(b'"' + content + b'"') or None
+        except ValueError:
+            return None
+    try:
+        return content.decode("utf-8")
+    except UnicodeDecodeError:
+        return None
+
+
+def _chunk_content(chunk: dict) -> str:
+    """Content of a fully parsed chunk: delta first, then message."""
+    choices = chunk.get("choices", [])
+    if not choices:
+        return ""
+    choice = choices[0]
+    return (
+        choice.get("delta", {}).get("content", "")
+        or choice.get("message", {}).get("content", "")
+        or ""
+    )
+
 
 class APIError(Exception):
     """Base API error."""
@@ -35,32 +114,70 @@ class PerplexityClient:
             headers={
                 "Authorization": f"Bearer {config.api_key}",
                 "Content-Type": "application/json",
+                "Accept": "text/event-stream",
             },
             timeout=httpx.Timeout(connect=10, read=120, write=10, pool=10),
+            # httpx drops idle connections after 5s by default, which is shorter
+            # than a user takes to type the next message; keep the TLS
+            # connection alive across REPL turns instead.
+            limits=httpx.Limits(keepalive_expiry=120),
         )
 
-    def _build_payload(self, messages: list[dict], model: str, **overrides) -> dict:
-        payload = {
-            "model": model,
-            "messages": messages,
-            "temperature": self.config.temperature,
-            "max_tokens": self.config.max_tokens,
-            "top_p": self.config.top_p,
+        # Config-derived parts of every request body, rebuilt by refresh_payload():
+        # keys that are always sent, and search filters sent only when non-default
+        self._base_payload: dict = {}
+        self._optional_payload: dict = {}
+        self.refresh_payload()
+        # id(message) -> (message, encoded JSON) for the last conversation sent
+        self._encoded_messages: dict[int, tuple[dict, bytes]] = {}
+
+    def refresh_payload(self):
+        """Rebuild the cached payload templates after the config was changed."""
+        config = self.config
+        self._base_payload = {
+            "temperature": config.temperature,
+            "max_tokens": config.max_tokens,
+            "top_p": config.top_p,
             "stream": True,
-            "return_citations": self.config.return_citations,
-            "return_related_questions": self.config.return_related_questions,
-            "return_images": self.config.return_images,
+            "return_citations": config.return_citations,
+            "return_related_questions": config.return_related_questions,
+            "return_images": config.return_images,
         }
-        if self.config.search_domain_filter:
-            payload["search_domain_filter"] = self.config.search_domain_filter
-        if self.config.search_recency_filter:
-            payload["search_recency_filter"] = self.config.search_recency_filter
-        if self.config.search_mode != "web":
-            payload["search_mode"] = self.config.search_mode
-        if self.config.search_context_size != "medium":
-            payload["search_context_size"] = self.config.search_context_size
-        payload.update(overrides)
-        return payload
+        optional = {}
+        if config.search_domain_filter:
+            optional["search_domain_filter"] = config.search_domain_filter
+        if config.search_recency_filter:
+            optional["search_recency_filter"] = config.search_recency_filter
+        if config.search_mode != "web":
+            optional["search_mode"] = config.search_mode
+        if config.search_context_size != "medium":
+            optional["search_context_size"] = config.search_context_size
+        self._optional_payload = optional
+
+    def _build_payload(self, model: str, **overrides) -> dict:
+        """Everything in the request body except the messages."""
+        return {**self._base_payload, **self._optional_payload, "model": model, **overrides}
+
+    def _encode_messages(self, messages: list[dict]) -> bytes:
+        """Encode the conversation as a JSON array.
+
+        The whole history is resent every turn, so each message dict is encoded
+        once and its bytes reused while the same dict stays in the list. Message
+        dicts are replaced, never mutated in place, once they have been sent.
+        """
+        cache = {}
+        for msg in messages:
+            entry = self._encoded_messages.get(id(msg))
+            if entry is None or entry[0] is not msg:
+                entry = (msg, json_dumps(msg))
+            cache[id(msg)] = entry
+        self._encoded_messages = cache
+        return b"[" + b",".join(cache[id(msg)][1] for msg in messages) + b"]"
+
+    def _build_body(self, messages: list[dict], model: str, **overrides) -> bytes:
+        """Serialized request body with the encoded messages spliced in."""
+        head = json_dumps(self._build_payload(model, **overrides))
+        return head[:-1] + b',"messages":' + self._encode_messages(messages) + b"}"
 
     def stream_chat(
         self, messages: list[dict], model: str, **overrides
@@ -70,67 +187,69 @@ class PerplexityClient:
           - str: incremental text tokens (for display)
           - APIResponse: final response object (last yield, after stream ends)
         """
-        payload = self._build_payload(messages, model, **overrides)
-        previous_content = ""
+        # Serialized here rather than by httpx (stdlib json); the client
+        # already sends the Content-Type header.
+        body = self._build_body(messages, model, **overrides)
+        # Yielded deltas are collected and joined once at the end; `received`
+        # is their total length, i.e. the offset a cumulative chunk resumes at.
+        parts: list[str] = []
+        received = 0
+        last_content = ""
         final_data = {}
+        # Interior chunks are only scanned for their content; the raw text of
+        # the latest one is kept so the metadata can be parsed once at the end.
+        final_raw = None
 
         try:
-            with connect_sse(
-                self.client, "POST", "/chat/completions", json=payload
-            ) as event_source:
+            with self.client.stream("POST", "/chat/completions", content=body) as response:
                 # Check HTTP status before iterating
-                if event_source.response.status_code == 401:
+                if response.status_code == 401:
                     raise AuthenticationError("Invalid API key", 401)
-                if event_source.response.status_code == 402:
+                if response.status_code == 402:
                     raise APIError(
                         "Insufficient balance. Top up at perplexity.ai/settings/api", 402
                     )
-                if event_source.response.status_code == 429:
+                if response.status_code == 429:
                     raise RateLimitError("Rate limited. Wait and retry.", 429)
-                if event_source.response.status_code >= 400:
+                if response.status_code >= 400:
                     raise APIError(
-                        f"API error {event_source.response.status_code}",
-                        event_source.response.status_code,
+                        f"API error {response.status_code}",
+                        response.status_code,
                     )
 
-                for sse in event_source.iter_sse():
-                    if sse.data == "[DONE]":
+                # iter_bytes() without a chunk_size hands over data as it
+                # arrives; a fixed chunk_size would hold back small events.
+                for data in _iter_sse_data(response.iter_bytes()):
+                    # Sentinel checked on the raw bytes; nothing is decoded
+                    # except the delta content itself
+                    if data == b"[DONE]":
                         break
 
-                    try:
-                        chunk = json.loads(sse.data)
-                    except json.JSONDecodeError:
-                        continue
-
-                    final_data = chunk
+                    content = _fast_delta(data)
+                    if content is None:
+                        try:
+                            chunk = json_loads(data)
+                        except ValueError:
+                            continue
+                        final_data, final_raw = chunk, None
+                        content = _chunk_content(chunk)
+                    else:
+                        final_raw = data
 
                     # Extract content — handle cumulative mode
-                    delta_content = ""
-                    choices = chunk.get("choices", [])
-                    if choices:
-                        choice = choices[0]
-                        content = (
-                            choice.get("delta", {}).get("content", "")
-                            or choice.get("message", {}).get("content", "")
-                            or ""
-                        )
-
-                        if content:
-                            if len(content) > len(previous_content) and content.startswith(
-                                previous_content
-                            ):
-                                # Cumulative: extract only the new part
-                                delta_content = content[len(previous_content) :]
-                            elif content != previous_content:
-                                # True delta or first chunk
-                                delta_content = content
-                            previous_content = (
-                                content
-                                if len(content) >= len(previous_content)
-                                else previous_content + content
-                            )
+                    if not content:
+                        continue
+                    if len(last_content) == received and content.startswith(last_content):
+                        # Cumulative (or first chunk): extract only the new part
+                        delta_content = content[received:]
+                    else:
+                        # True delta
+                        delta_content = content
+                    last_content = content
 
                     if delta_content:
+                        parts.append(delta_content)
+                        received += len(delta_content)
                         yield delta_content
 
         except (AuthenticationError, RateLimitError, APIError):
@@ -140,48 +259,65 @@ class PerplexityClient:
         except httpx.TransportError as e:
             raise APIError(f"Network error: {e}")
 
+        if final_raw is not None:
+            try:
+                final_data = json_loads(final_raw)
+            except ValueError:
+                pass
+
         # Parse the final chunk for metadata
-        yield self._parse_final_response(final_data, previous_content)
+        yield self._parse_final_response(final_data, "".join(parts))
 
     def _parse_final_response(self, data: dict, full_content: str) -> APIResponse:
-        """Extract citations, usage, cost from the final SSE chunk."""
+        """Extract citations, usage, cost from the final SSE chunk.
+
+        APIResponse is built with model_construct(): every field is filled
+        explicitly here, so pydantic's validation pass adds nothing.
+        """
         citations = data.get("citations", []) or []
 
+        search_results = []
         search_results_raw = data.get("search_results", []) or []
-        search_results = [
-            SearchResult(
-                title=sr.get("title", ""),
-                url=sr.get("url", ""),
-                snippet=sr.get("snippet", ""),
-                date=sr.get("date"),
-                source=sr.get("source", "web"),
+        if search_results_raw:
+            make_search_result = SearchResult
+            search_results = [
+                make_search_result(
+                    title=sr.get("title", ""),
+                    url=sr.get("url", ""),
+                    snippet=sr.get("snippet", ""),
+                    date=sr.get("date"),
+                    source=sr.get("source", "web"),
+                )
+                for sr in search_results_raw
+            ]
+
+        usage = _EMPTY_USAGE
+        usage_raw = data.get("usage", {}) or {}
+        if usage_raw:
+            usage = UsageInfo(
+                prompt_tokens=usage_raw.get("prompt_tokens", 0),
+                completion_tokens=usage_raw.get("completion_tokens", 0),
+                total_tokens=usage_raw.get("total_tokens", 0),
+                citation_tokens=usage_raw.get("citation_tokens", 0),
+                reasoning_tokens=usage_raw.get("reasoning_tokens", 0),
+                num_search_queries=usage_raw.get("num_search_queries", 0),
             )
-            for sr in search_results_raw
-        ]
-
-        usage_raw = data.get("usage", {})
-        usage = UsageInfo(
-            prompt_tokens=usage_raw.get("prompt_tokens", 0),
-            completion_tokens=usage_raw.get("completion_tokens", 0),
-            total_tokens=usage_raw.get("total_tokens", 0),
-            citation_tokens=usage_raw.get("citation_tokens", 0),
-            reasoning_tokens=usage_raw.get("reasoning_tokens", 0),
-            num_search_queries=usage_raw.get("num_search_queries", 0),
-        )
 
-        cost_raw = usage_raw.get("cost", {})
-        cost = CostInfo(
-            input_tokens_cost=cost_raw.get("input_tokens_cost", 0),
-            output_tokens_cost=cost_raw.get("output_tokens_cost", 0),
-            reasoning_tokens_cost=cost_raw.get("reasoning_tokens_cost", 0),
-            citation_tokens_cost=cost_raw.get("citation_tokens_cost", 0),
-            search_queries_cost=cost_raw.get("search_queries_cost", 0),
-            total_cost=cost_raw.get("total_cost", 0),
-        )
+        cost = _EMPTY_COST
+        cost_raw = usage_raw.get("cost", {}) or {}
+        if cost_raw:
+            cost = CostInfo(
+                input_tokens_cost=cost_raw.get("input_tokens_cost", 0),
+                output_tokens_cost=cost_raw.get("output_tokens_cost", 0),
+                reasoning_tokens_cost=cost_raw.get("reasoning_tokens_cost", 0),
+                citation_tokens_cost=cost_raw.get("citation_tokens_cost", 0),
+                search_queries_cost=cost_raw.get("search_queries_cost", 0),
+                total_cost=cost_raw.get("total_cost", 0),
+            )
 
         related = data.get("related_questions", []) or []
 
-        return APIResponse(
+        return APIResponse.model_construct(
             content=full_content,
             citations=citations,
             search_results=search_results,
@@ -1,4 +1,6 @@
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
 
 from rich.console import Console
 
@@ -7,9 +9,8 @@ from .api import PerplexityClient, APIError, AuthenticationError, RateLimitError
 from .streaming import StreamController, StreamCancelled
 from .db import Database
 from .ui import UIRenderer
-from .prompt import create_prompt_session, get_input
-from .commands import find_command, COMMANDS
-from .export import export_markdown, export_json, ExportError
+from .commands import find_command, HELP_ROWS
+from .jsonutil import json_dumps
 from .logger import setup_logging
 
 logger = logging.getLogger(__name__)
@@ -17,9 +18,16 @@ logger = logging.getLogger(__name__)
 
 class ChatApp:
     def __init__(self):
-        self.config = load_config()
+        # Commands like /temp change settings in place, so keep them off the cached config
+        self.config = load_config().model_copy()
         setup_logging(self.config.log_path)
 
+        # Open the database in the background while the rest of the app and
+        # the welcome banner are set up; _wait_for_db() collects it.
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pplx-db")
+        self._db_future = executor.submit(Database, self.config.db_path)
+        executor.shutdown(wait=False)
+
         self.console = Console()
         self.ui = UIRenderer()
 
@@ -27,14 +35,14 @@ class ChatApp:
         self.db = None
         self.client = None
         try:
-            self.db = Database(self.config.db_path)
             self.client = PerplexityClient(self.config)
         except Exception:
             self._cleanup()
             raise
 
         self.stream_ctrl = StreamController(self.client, self.ui, self.console, self.config)
-        self.prompt_session = create_prompt_session()
+        # Created in run(); inline mode never needs prompt_toolkit
+        self.prompt_session = None
 
         self.current_model = self.config.default_model
         self.session_id: int | None = None
@@ -45,6 +53,9 @@ class ChatApp:
 
     def run(self):
         """Main entry point — interactive REPL."""
+        from .prompt import create_prompt_session, get_input
+
+        self.prompt_session = create_prompt_session()
         self.console.print(self.ui.render_welcome())
         self._init_session()
 
@@ -93,10 +104,11 @@ class ChatApp:
         self._init_session()
 
         self.messages.append({"role": "user", "content": question})
-        self.db.add_message(self.session_id, "user", question)
 
         try:
             response = self.stream_ctrl.stream_response(self.messages, self.current_model)
+            # Persisted only once the request went through
+            self.db.add_message(self.session_id, "user", question)
             if response and self.config.show_cost:
                 self.console.print(
                     self.ui.render_session_cost(response.cost.total_cost, response.usage.total_tokens)
@@ -114,8 +126,19 @@ class ChatApp:
         finally:
             self._cleanup()
 
+    def _wait_for_db(self):
+        """Block until the background database open has finished."""
+        if self.db is not None:
+            return
+        try:
+            self.db = self._db_future.result()
+        except Exception:
+            self._cleanup()
+            raise
+
     def _init_session(self):
         """Initialize system message and DB session."""
+        self._wait_for_db()
         self.messages = [{"role": "system", "content": self.config.system_prompt}]
         self.session_id = self.db.create_session(self.current_model)
         self.db.add_message(self.session_id, "system", self.config.system_prompt)
@@ -123,31 +146,35 @@ class ChatApp:
     def _send_message(self, text: str):
         """Send user message, stream response, save to DB."""
         self.messages.append({"role": "user", "content": text})
-        self.db.add_message(self.session_id, "user", text)
 
         try:
             response = self.stream_ctrl.stream_response(self.messages, self.current_model)
 
+            # The whole turn is written in one commit once the stream is done,
+            # so a failed or cancelled request leaves nothing to undo in the DB
+            with self.db.transaction():
+                self.db.add_message(self.session_id, "user", text)
+                if response:
+                    self.db.add_message(
+                        self.session_id,
+                        "assistant",
+                        response.content,
+                        citations=response.citations,
+                        # Plain field dicts through orjson, skipping pydantic's serializer
+                        usage_json=json_dumps(asdict(response.usage)).decode(),
+                        cost_json=json_dumps(asdict(response.cost)).decode(),
+                    )
+                    self.db.update_session_cost(
+                        self.session_id, response.cost.total_cost, response.usage.total_tokens
+                    )
+
             if response:
                 # Add assistant message to conversation
                 self.messages.append({"role": "assistant", "content": response.content})
 
-                # Save to DB
-                self.db.add_message(
-                    self.session_id,
-                    "assistant",
-                    response.content,
-                    citations=response.citations,
-                    usage_json=response.usage.model_dump_json(),
-                    cost_json=response.cost.model_dump_json(),
-                )
-
                 # Update session cost tracking
                 self.session_cost += response.cost.total_cost
                 self.session_tokens += response.usage.total_tokens
-                self.db.update_session_cost(
-                    self.session_id, response.cost.total_cost, response.usage.total_tokens
-                )
 
                 # Show cost line if enabled
                 if self.config.show_cost:
@@ -183,20 +210,18 @@ class ChatApp:
             logger.exception("Unexpected error in _send_message")
 
     def _rollback_user_message(self):
-        """Remove failed user message from both memory and DB."""
+        """Remove failed user message from the conversation.
+
+        Nothing needs undoing in the DB: a turn is only written after its
+        response has streamed, and a failed write rolls back on its own.
+        """
         if self.messages and self.messages[-1].get("role") == "user":
             self.messages.pop()
-        self.db.delete_last_message(self.session_id)
 
     # --- Command Handlers ---
 
     def cmd_help(self, args: str):
-        commands_dict = {}
-        for cmd in COMMANDS:
-            aliases = f" ({', '.join(cmd.aliases)})" if cmd.aliases else ""
-            name = f"{cmd.name} {cmd.args}" if cmd.args else cmd.name
-            commands_dict[name + aliases] = cmd.description
-        self.console.print(self.ui.render_help(commands_dict))
+        self.console.print(self.ui.render_help(HELP_ROWS))
 
     def cmd_model(self, args: str):
         if args.strip() and args.strip() in MODELS:
@@ -301,6 +326,8 @@ class ChatApp:
         self.console.print(f"  Session renamed to [bold]{args.strip()}[/bold]\n")
 
     def cmd_export(self, args: str):
+        from .export import export_markdown, export_json, ExportError
+
         fmt = args.strip().lower() or "md"
         session = self.db.get_session(self.session_id)
         if not session:
@@ -343,6 +370,7 @@ class ChatApp:
             self.config.search_domain_filter = []
             self.config.search_recency_filter = None
             self.config.search_mode = "web"
+            self.client.refresh_payload()
             self.console.print("  Search filters cleared.\n")
             return
 
@@ -357,10 +385,12 @@ class ChatApp:
         if option == "domain":
             domains = [d.strip() for d in value.split(",")]
             self.config.search_domain_filter = domains
+            self.client.refresh_payload()
             self.console.print(f"  Domain filter: [bold]{domains}[/bold]\n")
         elif option == "recency":
             if value in ("hour", "day", "week", "month", "year"):
                 self.config.search_recency_filter = value
+                self.client.refresh_payload()
                 self.console.print(f"  Recency filter: [bold]{value}[/bold]\n")
             else:
                 self.console.print(
@@ -369,6 +399,7 @@ class ChatApp:
         elif option == "mode":
             if value in ("web", "academic", "sec"):
                 self.config.search_mode = value
+                self.client.refresh_payload()
                 self.console.print(f"  Search mode: [bold]{value}[/bold]\n")
             else:
                 self.console.print(
@@ -390,6 +421,7 @@ class ChatApp:
                 self.console.print("  [yellow]Temperature must be between 0.0 and 2.0[/yellow]\n")
                 return
             self.config.temperature = val
+            self.client.refresh_payload()
             self.console.print(f"  Temperature: [bold cyan]{val}[/bold cyan]\n")
         except ValueError:
             self.console.print("  [yellow]Usage: /temp <0.0-2.0>[/yellow]\n")
@@ -405,6 +437,7 @@ class ChatApp:
                 self.console.print("  [yellow]Top-p must be between 0.0 and 1.0[/yellow]\n")
                 return
             self.config.top_p = val
+            self.client.refresh_payload()
             self.console.print(f"  Top-p: [bold cyan]{val}[/bold cyan]\n")
         except ValueError:
             self.console.print("  [yellow]Usage: /top_p <0.0-1.0>[/yellow]\n")
@@ -420,6 +453,7 @@ class ChatApp:
                 self.console.print("  [yellow]Max tokens must be between 1 and 128000[/yellow]\n")
                 return
             self.config.max_tokens = val
+            self.client.refresh_payload()
             self.console.print(f"  Max tokens: [bold cyan]{val}[/bold cyan]\n")
         except ValueError:
             self.console.print("  [yellow]Usage: /maxtokens <number>[/yellow]\n")
@@ -435,7 +469,9 @@ class ChatApp:
         self.console.print("  System prompt updated.\n")
 
     def cmd_info(self, args: str):
-        info = (
+        domains = self.config.search_domain_filter
+        recency = self.config.search_recency_filter
+        self.console.print(
             f"  Model:      [bold cyan]{self.current_model}[/bold cyan]\n"
             f"  Session:    [bold]#{self.session_id}[/bold]\n"
             f"  Cost:       [bold yellow]${self.session_cost:.6f}[/bold yellow]\n"
@@ -445,12 +481,9 @@ class ChatApp:
             f"  Temperature: {self.config.temperature}\n"
             f"  Top-p:      {self.config.top_p}\n"
             f"  Search:     {self.config.search_mode}"
+            f"{f' | domains: {domains}' if domains else ''}"
+            f"{f' | recency: {recency}' if recency else ''}\n"
         )
-        if self.config.search_domain_filter:
-            info += f" | domains: {self.config.search_domain_filter}"
-        if self.config.search_recency_filter:
-            info += f" | recency: {self.config.search_recency_filter}"
-        self.console.print(info + "\n")
 
     def cmd_exit(self, args: str):
         self.running = False
@@ -461,3 +494,9 @@ class ChatApp:
             self.client.close()
         if self.db:
             self.db.close()
+        elif not self._db_future.cancel():
+            # Opened (or failed) in the background but never collected
+            try:
+                self._db_future.result().close()
+            except Exception:
+                pass
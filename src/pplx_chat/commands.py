@@ -1,7 +1,7 @@
 from dataclasses import dataclass, field
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Command:
     name: str
     aliases: list[str] = field(default_factory=list)
@@ -33,17 +33,26 @@ COMMANDS = [
 ]
 
 
+def _help_label(cmd: Command) -> str:
+    name = f"{cmd.name} {cmd.args}" if cmd.args else cmd.name
+    aliases = f" ({', '.join(cmd.aliases)})" if cmd.aliases else ""
+    return name + aliases
+
+
+# (label, description) rows for /help — the registry is static, so built once
+HELP_ROWS = [(_help_label(cmd), cmd.description) for cmd in COMMANDS]
+
+# Every name and alias mapped to its command
+_COMMAND_INDEX = {key: cmd for cmd in COMMANDS for key in (cmd.name, *cmd.aliases)}
+
+
 def find_command(input_text: str) -> tuple[Command | None, str]:
     """Match input to a command. Returns (command, remaining_args)."""
     parts = input_text.strip().split(maxsplit=1)
     if not parts or not parts[0].startswith("/"):
         return None, input_text
 
-    cmd_str = parts[0].lower()
-    args = parts[1] if len(parts) > 1 else ""
-
-    for cmd in COMMANDS:
-        if cmd_str == cmd.name or cmd_str in cmd.aliases:
-            return cmd, args
-
-    return None, input_text
+    cmd = _COMMAND_INDEX.get(parts[0].lower())
+    if cmd is None:
+        return None, input_text
+    return cmd, parts[1] if len(parts) > 1 else ""
@@ -1,7 +1,7 @@
+import functools
 import logging
 from pathlib import Path
 
-import yaml
 from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -10,6 +10,7 @@ logger = logging.getLogger(__name__)
 # Project root: pplx-chat/ (3 levels up from this file: config.py → pplx_chat/ → src/ → pplx-chat/)
 _PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
 _ENV_FILE = _PROJECT_ROOT / ".env"
+_YAML_PATH = Path("~/.config/pplx-chat/config.yaml").expanduser()
 
 
 MODELS = {
@@ -89,16 +90,31 @@ class AppConfig(BaseSettings):
         return v
 
 
+@functools.lru_cache(maxsize=1)
 def load_config() -> AppConfig:
-    """Load config from .env, then overlay with yaml if it exists."""
-    yaml_path = Path("~/.config/pplx-chat/config.yaml").expanduser()
+    """Load config from .env, then overlay with yaml if it exists.
+
+    Parsed once per process; the returned object is shared, so callers that
+    change settings should work on a copy.
+    """
     yaml_overrides = {}
-    if yaml_path.exists():
+    if _YAML_PATH.exists():
+        # Only imported when there is a file to read; most setups use .env alone
+        import yaml
+
+        # libyaml's C loader when PyYAML was built with it; same output, much faster
+        loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
         try:
-            with open(yaml_path, encoding="utf-8") as f:
-                yaml_overrides = yaml.safe_load(f) or {}
+            with open(_YAML_PATH, encoding="utf-8") as f:
+                yaml_overrides = yaml.load(f, Loader=loader) or {}
         except yaml.YAMLError as e:
             logger.warning("Invalid YAML config, using defaults: %s", e)
         except OSError as e:
             logger.warning("Cannot read config file, using defaults: %s", e)
     return AppConfig(**yaml_overrides)
+
+
+def reload_config() -> AppConfig:
+    """Drop the cached config and read .env and yaml again."""
+    load_config.cache_clear()
+    return load_config()
@@ -1,13 +1,105 @@
-import json
 import logging
+import os
+import queue
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
+from itertools import islice
 from pathlib import Path
+from typing import Iterable, Iterator
 
+from .jsonutil import json_dumps
 from .models import Message, Role, Session
 
 logger = logging.getLogger(__name__)
 
+# Connection settings. Under WAL, synchronous=NORMAL skips the fsync on each
+# commit (the WAL is synced at checkpoints instead): a power loss can drop the
+# last few turns, but the database never corrupts. The cache/mmap sizes are
+# upper bounds, not allocations — a small history uses far less.
+_PRAGMAS = (
+    "journal_mode=WAL",
+    "synchronous=NORMAL",
+    "cache_size=-65536",  # 64 MiB page cache
+    "temp_store=MEMORY",
+    "mmap_size=268435456",  # 256 MiB memory-mapped reads
+    "busy_timeout=5000",  # wait up to 5s for another pplx process's lock
+    "foreign_keys=ON",
+)
+# The subset that applies to the read-only pool connections
+_READER_PRAGMAS = (
+    "cache_size=-65536",
+    "temp_store=MEMORY",
+    "mmap_size=268435456",
+    "busy_timeout=5000",
+)
+
+# Upper bound on pooled read-only connections; they are opened on demand, and
+# any beyond this are closed after a single use
+_READER_POOL_SIZE = 4
+
+# Table definitions, formatted with the table name so the timestamp migration
+# can build new copies. Timestamps are INTEGER microseconds since the epoch.
+_SESSIONS_TABLE = """
+    CREATE TABLE IF NOT EXISTS {name} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL DEFAULT '',
+        model TEXT NOT NULL DEFAULT 'sonar',
+        created_at INTEGER NOT NULL,
+        updated_at INTEGER NOT NULL,
+        total_cost REAL NOT NULL DEFAULT 0.0,
+        total_tokens INTEGER NOT NULL DEFAULT 0,
+        msg_count INTEGER NOT NULL DEFAULT 0
+    );
+"""
+_MESSAGES_TABLE = """
+    CREATE TABLE IF NOT EXISTS {name} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        session_id INTEGER NOT NULL,
+        role TEXT NOT NULL,
+        content TEXT NOT NULL,
+        timestamp INTEGER NOT NULL,
+        citations TEXT DEFAULT '[]',
+        usage_json TEXT DEFAULT '{{}}',
+        cost_json TEXT DEFAULT '{{}}',
+        FOREIGN KEY (session_id) REFERENCES sessions(id) ON DELETE CASCADE
+    );
+"""
+
+# SQL for the per-turn and per-load paths. sqlite3 caches prepared statements
+# by SQL text, so these are parsed once per connection and reused.
+_SQL_INSERT_MESSAGE = """INSERT INTO messages
+    (session_id, role, content, timestamp, citations, usage_json, cost_json)
+    VALUES (?, ?, ?, ?, ?, ?, ?)"""
+_SQL_TOUCH_SESSION = "UPDATE sessions SET updated_at = ? WHERE id = ?"
+_SQL_GET_SESSION = "SELECT * FROM sessions WHERE id = ?"
+_SQL_GET_MESSAGES = (
+    "SELECT role, content, timestamp FROM messages WHERE session_id = ? ORDER BY id"
+)
+_SQL_GET_MESSAGES_TAIL = (
+    "SELECT role, content, timestamp FROM messages WHERE session_id = ? ORDER BY id DESC LIMIT ?"
+)
+_SQL_LIST_SESSIONS = """SELECT id, name, model, created_at, updated_at, total_cost, total_tokens,
+        msg_count
+    FROM sessions ORDER BY updated_at DESC LIMIT ?"""
+
+# Rows handed to executemany per call in add_messages_bulk
+_BULK_BATCH_SIZE = 10_000
+
+
+def _now_us() -> int:
+    return time.time_ns() // 1000
+
+
+def _to_us(dt: datetime) -> int:
+    return round(dt.timestamp() * 1_000_000)
+
+
+def _from_us(us: int) -> datetime:
+    return datetime.fromtimestamp(us / 1_000_000)
+
 
 class DatabaseError(Exception):
     """Database operation failed."""
@@ -18,10 +110,27 @@ class Database:
     def __init__(self, db_path: Path):
         self.db_path = db_path
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # Nesting depth of transaction() blocks; only the outermost one commits
+        self._tx_depth = 0
+        # Idle read-only connections; under WAL they read alongside the writer
+        self._readers: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._reader_count = 0
+        self._reader_lock = threading.Lock()
+        # Resolved once; every pooled reader opens the same read-only URI
+        self._reader_uri = f"{db_path.resolve().as_uri()}?mode=ro"
         try:
-            self.conn = sqlite3.connect(str(db_path))
-            self.conn.execute("PRAGMA journal_mode=WAL")
-            self.conn.execute("PRAGMA foreign_keys=ON")
+            # Opened on a worker thread at startup and used from the main thread
+            # afterwards; access is never concurrent, so the check is dropped.
+            # isolation_level=None: no implicit transactions, transaction()
+            # issues BEGIN/COMMIT itself.
+            self.conn = sqlite3.connect(
+                os.fsencode(db_path),
+                check_same_thread=False,
+                isolation_level=None,
+                cached_statements=256,
+            )
+            for pragma in _PRAGMAS:
+                self.conn.execute(f"PRAGMA {pragma}")
             self.conn.row_factory = sqlite3.Row
             self._create_tables()
         except sqlite3.Error as e:
@@ -29,42 +138,161 @@ class Database:
             raise DatabaseError(f"Cannot open database: {e}") from e
 
     def _create_tables(self):
+        self.conn.executescript(
+            _SESSIONS_TABLE.format(name="sessions") + _MESSAGES_TABLE.format(name="messages")
+        )
+        self._migrate()
+        # sessions.msg_count is kept current by triggers so listing sessions
+        # never has to count messages
         self.conn.executescript("""
-            CREATE TABLE IF NOT EXISTS sessions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL DEFAULT '',
-                model TEXT NOT NULL DEFAULT 'sonar',
-                created_at TEXT NOT NULL,
-                updated_at TEXT NOT NULL,
-                total_cost REAL NOT NULL DEFAULT 0.0,
-                total_tokens INTEGER NOT NULL DEFAULT 0
-            );
-
-            CREATE TABLE IF NOT EXISTS messages (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                session_id INTEGER NOT NULL,
-                role TEXT NOT NULL,
-                content TEXT NOT NULL,
-                timestamp TEXT NOT NULL,
-                citations TEXT DEFAULT '[]',
-                usage_json TEXT DEFAULT '{}',
-                cost_json TEXT DEFAULT '{}',
-                FOREIGN KEY (session_id) REFERENCES sessions(id) ON DELETE CASCADE
-            );
-
+            -- id is the rowid, which every SQLite index carries as its last key,
+            -- so this already works as (session_id, id): per-session lookups
+            -- in id order need no sort or table scan.
             CREATE INDEX IF NOT EXISTS idx_messages_session
                 ON messages(session_id);
+
+            CREATE TRIGGER IF NOT EXISTS trg_messages_insert AFTER INSERT ON messages
+            BEGIN
+                UPDATE sessions SET msg_count = msg_count + 1 WHERE id = NEW.session_id;
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_messages_delete AFTER DELETE ON messages
+            BEGIN
+                UPDATE sessions SET msg_count = msg_count - 1 WHERE id = OLD.session_id;
+            END;
         """)
-        self.conn.commit()
+
+    def _migrate(self):
+        """Bring databases created by older versions up to the current schema."""
+        session_columns = {
+            row["name"]: row["type"]
+            for row in self.conn.execute("PRAGMA table_info(sessions)")
+        }
+        if "msg_count" not in session_columns:
+            with self.transaction():
+                self.conn.execute(
+                    "ALTER TABLE sessions ADD COLUMN msg_count INTEGER NOT NULL DEFAULT 0"
+                )
+                self.conn.execute(
+                    """UPDATE sessions SET msg_count =
+                       (SELECT COUNT(*) FROM messages WHERE session_id = sessions.id)"""
+                )
+        if session_columns["created_at"].upper() == "TEXT":
+            self._migrate_timestamps()
+
+    def _migrate_timestamps(self):
+        """Rebuild both tables with INTEGER epoch-microsecond timestamps.
+
+        SQLite cannot change a column's type in place, and a TEXT column would
+        store integers as text, so the tables are copied into new ones. The old
+        ISO strings are naive local times, which is how datetime.timestamp()
+        reads them.
+        """
+        self.conn.create_function(
+            "iso_to_us", 1, lambda iso: _to_us(datetime.fromisoformat(iso)), deterministic=True
+        )
+        # Dropping the old sessions table would cascade into messages
+        self.conn.execute("PRAGMA foreign_keys=OFF")
+        try:
+            with self.transaction():
+                self.conn.execute(_SESSIONS_TABLE.format(name="sessions_new"))
+                self.conn.execute(
+                    """INSERT INTO sessions_new
+                       SELECT id, name, model, iso_to_us(created_at), iso_to_us(updated_at),
+                              total_cost, total_tokens, msg_count
+                       FROM sessions"""
+                )
+                self.conn.execute(_MESSAGES_TABLE.format(name="messages_new"))
+                self.conn.execute(
+                    """INSERT INTO messages_new
+                       SELECT id, session_id, role, content, iso_to_us(timestamp),
+                              citations, usage_json, cost_json
+                       FROM messages"""
+                )
+                self.conn.execute("DROP TABLE messages")
+                self.conn.execute("DROP TABLE sessions")
+                self.conn.execute("ALTER TABLE sessions_new RENAME TO sessions")
+                self.conn.execute("ALTER TABLE messages_new RENAME TO messages")
+        finally:
+            self.conn.execute("PRAGMA foreign_keys=ON")
+
+    def _open_reader(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self._reader_uri, uri=True, check_same_thread=False, cached_statements=256
+        )
+        for pragma in _READER_PRAGMAS:
+            conn.execute(f"PRAGMA {pragma}")
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @contextmanager
+    def _reader(self):
+        """Borrow a read-only connection from the pool.
+
+        Reads see committed data only, so they must not be used for queries
+        inside a transaction() block that expect its uncommitted writes.
+        """
+        pooled = True
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            # Never wait for a pooled reader: in the single-threaded REPL no one
+            # else could hand one back. Past the limit, use a throwaway one.
+            with self._reader_lock:
+                pooled = self._reader_count < _READER_POOL_SIZE
+                if pooled:
+                    self._reader_count += 1
+            try:
+                conn = self._open_reader()
+            except sqlite3.Error:
+                if pooled:
+                    with self._reader_lock:
+                        self._reader_count -= 1
+                raise
+        try:
+            yield conn
+        finally:
+            if pooled:
+                self._readers.put(conn)
+            else:
+                conn.close()
+
+    @contextmanager
+    def transaction(self):
+        """Run the enclosed writes in one BEGIN IMMEDIATE ... COMMIT.
+
+        Every write method uses this, so a block that calls several of them
+        commits (and fsyncs) once. Nested blocks join the outermost one; it
+        rolls back if an exception escapes. sqlite3.Error propagates as is.
+        """
+        if self._tx_depth:
+            self._tx_depth += 1
+            try:
+                yield self
+            finally:
+                self._tx_depth -= 1
+            return
+
+        self.conn.execute("BEGIN IMMEDIATE")
+        self._tx_depth = 1
+        try:
+            yield self
+            self.conn.execute("COMMIT")
+        except BaseException:
+            if self.conn.in_transaction:
+                self.conn.execute("ROLLBACK")
+            raise
+        finally:
+            self._tx_depth = 0
 
     def create_session(self, model: str, name: str = "") -> int:
-        now = datetime.now().isoformat()
+        now = _now_us()
         try:
-            cursor = self.conn.execute(
-                "INSERT INTO sessions (name, model, created_at, updated_at) VALUES (?, ?, ?, ?)",
-                (name, model, now, now),
-            )
-            self.conn.commit()
+            with self.transaction():
+                cursor = self.conn.execute(
+                    "INSERT INTO sessions (name, model, created_at, updated_at) VALUES (?, ?, ?, ?)",
+                    (name, model, now, now),
+                )
             return cursor.lastrowid
         except sqlite3.Error as e:
             logger.exception("Failed to create session")
@@ -80,65 +308,69 @@ class Database:
         cost_json: str = "{}",
     ) -> int:
         """Add a message and return its row ID."""
-        now = datetime.now().isoformat()
+        now = _now_us()
+        citations_json = json_dumps(citations).decode() if citations else "[]"
         try:
-            cursor = self.conn.execute(
-                """INSERT INTO messages
-                   (session_id, role, content, timestamp, citations, usage_json, cost_json)
-                   VALUES (?, ?, ?, ?, ?, ?, ?)""",
-                (session_id, role, content, now, json.dumps(citations or []), usage_json, cost_json),
-            )
-            self.conn.execute(
-                "UPDATE sessions SET updated_at = ? WHERE id = ?",
-                (now, session_id),
-            )
-            self.conn.commit()
+            with self.transaction():
+                cursor = self.conn.execute(
+                    _SQL_INSERT_MESSAGE,
+                    (session_id, role, content, now, citations_json, usage_json, cost_json),
+                )
+                self.conn.execute(_SQL_TOUCH_SESSION, (now, session_id))
             return cursor.lastrowid
         except sqlite3.Error as e:
             logger.exception("Failed to add message")
             raise DatabaseError(f"Cannot save message: {e}") from e
 
-    def delete_last_message(self, session_id: int) -> bool:
-        """Delete the most recent message in a session. Used for rollback on API failure."""
+    def add_messages_bulk(
+        self, session_id: int, messages: Iterable[tuple[str, str]]
+    ) -> int:
+        """Insert many (role, content) messages in one transaction. Returns the count."""
+        now = _now_us()
+        rows = ((session_id, role, content, now) for role, content in messages)
+        count = 0
         try:
-            cursor = self.conn.execute(
-                """DELETE FROM messages WHERE id = (
-                    SELECT id FROM messages WHERE session_id = ? ORDER BY id DESC LIMIT 1
-                )""",
-                (session_id,),
-            )
-            self.conn.commit()
-            return cursor.rowcount > 0
+            with self.transaction():
+                while batch := list(islice(rows, _BULK_BATCH_SIZE)):
+                    self.conn.executemany(
+                        """INSERT INTO messages (session_id, role, content, timestamp)
+                           VALUES (?, ?, ?, ?)""",
+                        batch,
+                    )
+                    count += len(batch)
+                if count:
+                    self.conn.execute(_SQL_TOUCH_SESSION, (now, session_id))
+            return count
         except sqlite3.Error as e:
-            logger.exception("Failed to delete last message")
-            return False
+            logger.exception("Failed to add messages")
+            raise DatabaseError(f"Cannot save messages: {e}") from e
 
     def update_session_cost(self, session_id: int, cost: float, tokens: int):
         try:
-            self.conn.execute(
-                """UPDATE sessions
-                   SET total_cost = total_cost + ?, total_tokens = total_tokens + ?
-                   WHERE id = ?""",
-                (cost, tokens, session_id),
-            )
-            self.conn.commit()
+            with self.transaction():
+                self.conn.execute(
+                    """UPDATE sessions
+                       SET total_cost = total_cost + ?, total_tokens = total_tokens + ?
+                       WHERE id = ?""",
+                    (cost, tokens, session_id),
+                )
         except sqlite3.Error as e:
             logger.exception("Failed to update session cost")
 
-    def get_session(self, session_id: int) -> Session | None:
+    def get_session(self, session_id: int, load_messages: bool = True) -> Session | None:
+        """Load a session, with all its messages unless load_messages is False."""
         try:
-            row = self.conn.execute(
-                "SELECT * FROM sessions WHERE id = ?", (session_id,)
-            ).fetchone()
-            if not row:
-                return None
-            messages = self._get_messages(session_id)
+            with self._reader() as conn:
+                row = conn.execute(_SQL_GET_SESSION, (session_id,)).fetchone()
+                if not row:
+                    return None
+                messages = self._get_messages(conn, session_id) if load_messages else []
             return Session(
                 id=row["id"],
                 name=row["name"],
                 model=row["model"],
-                created_at=datetime.fromisoformat(row["created_at"]),
-                updated_at=datetime.fromisoformat(row["updated_at"]),
+                created_at=_from_us(row["created_at"]),
+                updated_at=_from_us(row["updated_at"]),
                 messages=messages,
                 total_cost=row["total_cost"],
                 total_tokens=row["total_tokens"],
@@ -147,37 +379,79 @@ class Database:
             logger.exception("Failed to get session")
             return None
 
-    def _get_messages(self, session_id: int) -> list[Message]:
-        rows = self.conn.execute(
-            "SELECT role, content, timestamp FROM messages WHERE session_id = ? ORDER BY id",
-            (session_id,),
-        ).fetchall()
-        return [
-            Message(
-                role=Role(r["role"]),
-                content=r["content"],
-                timestamp=datetime.fromisoformat(r["timestamp"]),
+    def iter_messages(self, session_id: int) -> Iterator[Message]:
+        """Yield a session's messages oldest first, reading rows as they are consumed.
+
+        Uses its own read-only connection rather than a pooled one, since a
+        partly consumed generator can stay open indefinitely. The connection
+        is closed once the generator is exhausted or closed.
+        """
+        try:
+            conn = self._open_reader()
+        except sqlite3.Error as e:
+            logger.exception("Failed to read messages")
+            return
+        try:
+            cursor = self._tuple_cursor(conn).execute(_SQL_GET_MESSAGES, (session_id,))
+            yield from self._make_messages(cursor)
+        except sqlite3.Error as e:
+            logger.exception("Failed to read messages")
+        finally:
+            conn.close()
+
+    def get_session_tail(self, session_id: int, n: int) -> list[Message]:
+        """Return the last n messages of a session, oldest first."""
+        try:
+            with self._reader() as conn:
+                rows = self._tuple_cursor(conn).execute(
+                    _SQL_GET_MESSAGES_TAIL, (session_id, n)
+                ).fetchall()
+        except sqlite3.Error as e:
+            logger.exception("Failed to read messages")
+            return []
+        rows.reverse()
+        return list(self._make_messages(rows))
+
+    def _get_messages(self, conn: sqlite3.Connection, session_id: int) -> list[Message]:
+        rows = self._tuple_cursor(conn).execute(_SQL_GET_MESSAGES, (session_id,)).fetchall()
+        return list(self._make_messages(rows))
+
+    @staticmethod
+    def _tuple_cursor(conn: sqlite3.Connection) -> sqlite3.Cursor:
+        # Plain tuples unpack faster than sqlite3.Row's by-name lookups
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        return cursor
+
+    @staticmethod
+    def _make_messages(rows: Iterable[tuple]) -> Iterator[Message]:
+        make_message = Message
+        for role, content, timestamp in rows:
+            yield make_message(
+                role=Role(role),
+                content=content,
+                timestamp=_from_us(timestamp),
             )
-            for r in rows
-        ]
 
     def list_sessions(self, limit: int = 20) -> list[dict]:
         try:
-            rows = self.conn.execute(
-                """SELECT id, name, model, created_at, updated_at, total_cost, total_tokens,
-                          (SELECT COUNT(*) FROM messages WHERE session_id = sessions.id) as msg_count
-                   FROM sessions ORDER BY updated_at DESC LIMIT ?""",
-                (limit,),
-            ).fetchall()
-            return [dict(r) for r in rows]
+            with self._reader() as conn:
+                rows = conn.execute(_SQL_LIST_SESSIONS, (limit,)).fetchall()
+            sessions = []
+            for r in rows:
+                session = dict(r)
+                session["created_at"] = _from_us(session["created_at"])
+                session["updated_at"] = _from_us(session["updated_at"])
+                sessions.append(session)
+            return sessions
         except sqlite3.Error as e:
             logger.exception("Failed to list sessions")
             return []
 
     def delete_session(self, session_id: int) -> bool:
         try:
-            cursor = self.conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
-            self.conn.commit()
+            with self.transaction():
+                cursor = self.conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
             return cursor.rowcount > 0
         except sqlite3.Error as e:
             logger.exception("Failed to delete session")
@@ -185,12 +459,19 @@ class Database:
 
     def rename_session(self, session_id: int, name: str):
         try:
-            self.conn.execute("UPDATE sessions SET name = ? WHERE id = ?", (name, session_id))
-            self.conn.commit()
+            with self.transaction():
+                self.conn.execute("UPDATE sessions SET name = ? WHERE id = ?", (name, session_id))
         except sqlite3.Error as e:
             logger.exception("Failed to rename session")
 
     def close(self):
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
+            except sqlite3.Error:
+                pass
         try:
             self.conn.close()
         except sqlite3.Error:
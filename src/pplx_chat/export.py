@@ -1,12 +1,19 @@
-import json
 import logging
+import re
 from datetime import datetime
 from pathlib import Path
 
-from .models import Session
+from .jsonutil import json_dumps_indent
+from .models import Role, Session
 
 logger = logging.getLogger(__name__)
 
+# System messages have no label and are left out of Markdown exports
+_ROLE_LABEL = {Role.USER: "**You:**", Role.ASSISTANT: "**Assistant:**"}
+
+# Everything except letters, digits, underscore, hyphen and space
+_SAFE_FN_RE = re.compile(r"[^\w\- ]")
+
 
 class ExportError(Exception):
     """Export operation failed."""
@@ -18,32 +25,26 @@ def export_markdown(session: Session, output_dir: Path) -> Path:
     filename = _safe_filename(session, "md")
     path = output_dir / filename
 
-    lines = [
-        f"# {session.name or f'Session #{session.id}'}",
-        "",
-        f"**Model:** {session.model}",
-        f"**Created:** {session.created_at.strftime('%Y-%m-%d %H:%M')}",
-        f"**Total cost:** ${session.total_cost:.6f}",
-        f"**Total tokens:** {session.total_tokens:,}",
-        "",
-        "---",
-        "",
-    ]
-
-    for msg in session.messages:
-        if msg.role.value == "system":
-            continue
-        role_label = "**You:**" if msg.role.value == "user" else "**Assistant:**"
-        lines.append(role_label)
-        lines.append("")
-        lines.append(msg.content)
-        lines.append("")
-        lines.append("---")
-        lines.append("")
+    header = (
+        f"# {session.name or f'Session #{session.id}'}\n"
+        "\n"
+        f"**Model:** {session.model}\n"
+        f"**Created:** {session.created_at.strftime('%Y-%m-%d %H:%M')}\n"
+        f"**Total cost:** ${session.total_cost:.6f}\n"
+        f"**Total tokens:** {session.total_tokens:,}\n"
+        "\n"
+        "---\n"
+    )
+    label = _ROLE_LABEL.get
+    body = "".join(
+        f"\n{label(msg.role)}\n\n{msg.content}\n\n---\n"
+        for msg in session.messages
+        if msg.role is not Role.SYSTEM
+    )
 
     try:
         output_dir.mkdir(parents=True, exist_ok=True)
-        path.write_text("\n".join(lines), encoding="utf-8")
+        path.write_bytes((header + body).encode("utf-8"))
     except OSError as e:
         logger.exception("Failed to export markdown")
         raise ExportError(f"Cannot write file: {e}") from e
@@ -75,7 +76,7 @@ def export_json(session: Session, output_dir: Path) -> Path:
 
     try:
         output_dir.mkdir(parents=True, exist_ok=True)
-        path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+        path.write_bytes(json_dumps_indent(data))
     except OSError as e:
         logger.exception("Failed to export JSON")
         raise ExportError(f"Cannot write file: {e}") from e
@@ -84,7 +85,6 @@ def export_json(session: Session, output_dir: Path) -> Path:
 
 def _safe_filename(session: Session, ext: str) -> str:
     name = session.name or f"session_{session.id}"
-    safe = "".join(c if c.isalnum() or c in "-_ " else "" for c in name)
-    safe = safe.strip().replace(" ", "_")[:50]
+    safe = _SAFE_FN_RE.sub("", name).strip().replace(" ", "_")[:50]
     ts = datetime.now().strftime("%Y%m%d_%H%M%S")
     return f"pplx_{safe}_{ts}.{ext}"
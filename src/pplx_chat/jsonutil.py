@@ -0,0 +1,19 @@
+"""JSON encode/decode using orjson when installed, stdlib json otherwise."""
+import json
+
+try:
+    # orjson is optional; it handles the same payloads several times faster.
+    # Both parsers raise ValueError subclasses on bad input (stdlib json may also
+    # raise UnicodeDecodeError for bytes), so parsing errors are caught as ValueError.
+    from orjson import OPT_INDENT_2, dumps as json_dumps, loads as json_loads
+
+    def json_dumps_indent(obj) -> bytes:
+        return json_dumps(obj, option=OPT_INDENT_2)
+except ImportError:
+    from json import loads as json_loads
+
+    def json_dumps(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def json_dumps_indent(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
@@ -1,3 +1,4 @@
+from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
 
@@ -10,13 +11,19 @@ class Role(str, Enum):
     ASSISTANT = "assistant"
 
 
-class Message(BaseModel):
+# Types we build ourselves (from the DB or already-parsed API data) are plain
+# slotted dataclasses; only APIResponse stays a pydantic model.
+
+
+@dataclass(slots=True, frozen=True)
+class Message:
     role: Role
     content: str
-    timestamp: datetime = Field(default_factory=datetime.now)
+    timestamp: datetime = field(default_factory=datetime.now)
 
 
-class UsageInfo(BaseModel):
+@dataclass(slots=True, frozen=True)
+class UsageInfo:
     prompt_tokens: int = 0
     completion_tokens: int = 0
     total_tokens: int = 0
@@ -25,7 +32,8 @@ class UsageInfo(BaseModel):
     num_search_queries: int = 0
 
 
-class CostInfo(BaseModel):
+@dataclass(slots=True, frozen=True)
+class CostInfo:
     input_tokens_cost: float = 0.0
     output_tokens_cost: float = 0.0
     reasoning_tokens_cost: float = 0.0
@@ -34,7 +42,8 @@ class CostInfo(BaseModel):
     total_cost: float = 0.0
 
 
-class SearchResult(BaseModel):
+@dataclass(slots=True, frozen=True)
+class SearchResult:
     title: str
     url: str
     snippet: str
@@ -54,12 +63,13 @@ class APIResponse(BaseModel):
     finish_reason: str = ""
 
 
-class Session(BaseModel):
+@dataclass(slots=True)
+class Session:
     id: int | None = None
     name: str = ""
     model: str = "sonar"
-    created_at: datetime = Field(default_factory=datetime.now)
-    updated_at: datetime = Field(default_factory=datetime.now)
-    messages: list[Message] = []
+    created_at: datetime = field(default_factory=datetime.now)
+    updated_at: datetime = field(default_factory=datetime.now)
+    messages: list[Message] = field(default_factory=list)
     total_cost: float = 0.0
     total_tokens: int = 0
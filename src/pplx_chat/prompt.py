@@ -9,45 +9,47 @@ from prompt_toolkit.styles import Style as PTStyle
 
 from .commands import COMMANDS
 
+_HISTORY_PATH = Path("~/.local/share/pplx-chat/prompt_history").expanduser()
 
-def create_prompt_session() -> PromptSession:
-    """Create a configured Prompt Toolkit session."""
+# Commands, key bindings and style never change, so they are built once
+
+# Command completer: names and aliases in COMMANDS order
+_COMMAND_NAMES = tuple(dict.fromkeys(n for cmd in COMMANDS for n in (cmd.name, *cmd.aliases)))
+_COMPLETER = WordCompleter(list(_COMMAND_NAMES), sentence=True)
+
+# Key bindings
+_BINDINGS = KeyBindings()
 
-    history_path = Path("~/.local/share/pplx-chat/prompt_history").expanduser()
-    history_path.parent.mkdir(parents=True, exist_ok=True)
 
-    # Key bindings
-    bindings = KeyBindings()
+@_BINDINGS.add("c-d")
+def _exit_handler(event):
+    """Ctrl+D to exit."""
+    event.app.exit(result=None)
 
-    @bindings.add("c-d")
-    def exit_handler(event):
-        """Ctrl+D to exit."""
-        event.app.exit(result=None)
 
-    @bindings.add("escape", "enter")
-    def multiline_handler(event):
-        """Alt+Enter for newline in input."""
-        event.current_buffer.insert_text("\n")
+@_BINDINGS.add("escape", "enter")
+def _multiline_handler(event):
+    """Alt+Enter for newline in input."""
+    event.current_buffer.insert_text("\n")
 
-    # Command completer
-    command_names = []
-    for cmd in COMMANDS:
-        command_names.append(cmd.name)
-        command_names.extend(cmd.aliases)
 
-    completer = WordCompleter(command_names, sentence=True)
+# Style
+_STYLE = PTStyle.from_dict({
+    "prompt": "bold green",
+    "": "",
+})
+
+
+def create_prompt_session() -> PromptSession:
+    """Create a configured Prompt Toolkit session."""
 
-    # Style
-    style = PTStyle.from_dict({
-        "prompt": "bold green",
-        "": "",
-    })
+    _HISTORY_PATH.parent.mkdir(parents=True, exist_ok=True)
 
     session = PromptSession(
-        history=FileHistory(str(history_path)),
-        key_bindings=bindings,
-        completer=completer,
-        style=style,
+        history=FileHistory(str(_HISTORY_PATH)),
+        key_bindings=_BINDINGS,
+        completer=_COMPLETER,
+        style=_STYLE,
         multiline=False,
         enable_history_search=True,
         mouse_support=False,
@@ -1,4 +1,5 @@
 import logging
+import time
 
 from rich.live import Live
 from rich.console import Console
@@ -10,6 +11,10 @@ from .ui import UIRenderer
 
 logger = logging.getLogger(__name__)
 
+# Tokens are coalesced into at most 15 display updates per second; they can
+# arrive far faster than the terminal redraws.
+_FLUSH_INTERVAL = 1 / 15
+
 
 class StreamCancelled(Exception):
     """User cancelled streaming with Ctrl+C."""
@@ -35,19 +40,44 @@ class StreamController:
         Raises StreamCancelled if user presses Ctrl+C during streaming.
         """
         accumulated = ""
+        pending: list[str] = []
+        last_flush = time.monotonic()
         api_response = None
 
         try:
+            chunks = self.client.stream_chat(messages, model, **overrides)
+
+            # The spinner needs Live's refresh thread to animate, but only until
+            # the first chunk arrives
             with Live(
                 self.ui.render_thinking(model),
                 console=self.console,
                 refresh_per_second=15,
+                transient=True,
+            ):
+                first = next(chunks, None)
+            if isinstance(first, str):
+                accumulated = first
+            elif isinstance(first, APIResponse):
+                api_response = first
+
+            # After that the display only changes when content does, so it is
+            # redrawn on each update instead of on a timer
+            with Live(
+                self.ui.render_streaming(accumulated, model),
+                console=self.console,
+                auto_refresh=False,
                 transient=False,
             ) as live:
-                for chunk in self.client.stream_chat(messages, model, **overrides):
+                for chunk in chunks:
                     if isinstance(chunk, str):
-                        accumulated += chunk
-                        live.update(self.ui.render_streaming(accumulated, model))
+                        pending.append(chunk)
+                        now = time.monotonic()
+                        if now - last_flush >= _FLUSH_INTERVAL:
+                            accumulated += "".join(pending)
+                            pending.clear()
+                            last_flush = now
+                            live.update(self.ui.render_streaming(accumulated, model), refresh=True)
                     elif isinstance(chunk, APIResponse):
                         api_response = chunk
 
@@ -57,7 +87,7 @@ class StreamController:
                         api_response, model,
                         show_citations=self.config.show_citations,
                         show_related=self.config.show_related,
-                    ))
+                    ), refresh=True)
         except KeyboardInterrupt:
             logger.debug("Streaming cancelled by user (Ctrl+C)")
             raise StreamCancelled()
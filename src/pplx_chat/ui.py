@@ -1,3 +1,5 @@
+from functools import cached_property
+
 from rich.console import Group
 from rich.panel import Panel
 from rich.markdown import Markdown
@@ -14,8 +16,18 @@ from .config import MODELS
 class UIRenderer:
     """All Rich rendering in one place. No business logic."""
 
+    def __init__(self):
+        # Per-model panels reused across turns; only their content changes
+        self._thinking_panels: dict[str, Panel] = {}
+        self._streaming_panels: dict[str, Panel] = {}
+
     def render_welcome(self) -> Panel:
         """Welcome banner on startup."""
+        return self._welcome_panel
+
+    @cached_property
+    def _welcome_panel(self) -> Panel:
+        # Static content; Rich renderables can be printed any number of times
         content = Text()
         content.append("PPLX Chat", style="bold cyan")
         content.append(f" v{__version__}\n", style="dim")
@@ -28,6 +40,10 @@ class UIRenderer:
 
     def render_model_selector(self) -> Table:
         """Model selection table."""
+        return self._model_selector_table
+
+    @cached_property
+    def _model_selector_table(self) -> Table:
         table = Table(
             title="Select Model",
             border_style="cyan",
@@ -45,17 +61,31 @@ class UIRenderer:
 
     def render_thinking(self, model: str) -> Panel:
         """Spinner panel while waiting for first token."""
-        spinner = Spinner("dots", text=Text(f" {model} is searching...", style="cyan"))
-        return Panel(spinner, border_style="blue", title=f"[bold blue]{model}[/bold blue]")
+        panel = self._thinking_panels.get(model)
+        if panel is None:
+            # The spinner picks its frame from elapsed time, so sharing one is fine
+            spinner = Spinner("dots", text=Text(f" {model} is searching...", style="cyan"))
+            panel = Panel(spinner, border_style="blue", title=f"[bold blue]{model}[/bold blue]")
+            self._thinking_panels[model] = panel
+        return panel
 
     def render_streaming(self, text: str, model: str) -> Panel:
-        """Live-updating panel during streaming."""
-        return Panel(
-            Markdown(text) if text.strip() else Text("..."),
-            border_style="blue",
-            title=f"[bold blue]{model}[/bold blue]",
-            subtitle="[dim]streaming...[/dim]",
-        )
+        """Live-updating panel during streaming.
+
+        Plain text: re-parsing the whole response as Markdown on every update
+        is quadratic. render_response does the one Markdown pass at the end.
+        """
+        panel = self._streaming_panels.get(model)
+        if panel is None:
+            panel = Panel(
+                Text("..."),
+                border_style="blue",
+                title=f"[bold blue]{model}[/bold blue]",
+                subtitle="[dim]streaming...[/dim]",
+            )
+            self._streaming_panels[model] = panel
+        panel.renderable = Text(text) if text.strip() else Text("...")
+        return panel
 
     def render_response(
         self, response: APIResponse, model: str,
@@ -125,7 +155,7 @@ class UIRenderer:
                 s["model"],
                 str(s["msg_count"]),
                 cost,
-                s["updated_at"][:19],
+                s["updated_at"].isoformat(timespec="seconds"),
             )
 
         return table
@@ -145,7 +175,7 @@ class UIRenderer:
             title="[bold red]Error[/bold red]",
         )
 
-    def render_help(self, commands: dict) -> Table:
+    def render_help(self, commands: list[tuple[str, str]]) -> Table:
         """Command help table."""
         table = Table(
             title="Commands",
@@ -156,7 +186,7 @@ class UIRenderer:
         table.add_column("Command", style="bold green", width=30)
         table.add_column("Description")
 
-        for cmd, desc in commands.items():
+        for cmd, desc in commands:
             table.add_row(cmd, desc)
 
         return table